@@ -0,0 +1,274 @@
+# backend/archive.py
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+import asyncio
+import json
+import os
+import zlib
+
+from sqlalchemy import delete, exists, insert
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from database import engine
+from models import Conversation, ConversationArchive, Message
+
+# --------------------------------------------------
+# Retention policy (override in .env)
+# --------------------------------------------------
+# Conversations untouched for this many days move to cold storage
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+
+# Archived conversations older than this are deleted for good (0 = keep forever)
+ARCHIVE_PURGE_AFTER_DAYS = int(os.getenv("ARCHIVE_PURGE_AFTER_DAYS", "0"))
+
+# Conversations archived per compaction run
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+
+# Minutes between background compaction runs (0 = disabled)
+ARCHIVE_INTERVAL_MINUTES = int(os.getenv("ARCHIVE_INTERVAL_MINUTES", "0"))
+
+
+# --------------------------------------------------
+# Payload encoding
+# --------------------------------------------------
+def _pack(messages: list) -> bytes:
+    """Compress a list of message dicts into an archive payload."""
+    return zlib.compress(json.dumps(messages).encode(), 9)
+
+
+def _unpack(payload: bytes) -> list:
+    """Decompress an archive payload back into message dicts."""
+    return json.loads(zlib.decompress(payload))
+
+
+def _message_to_dict(message: Message) -> dict:
+    return {
+        "id": message.id,
+        "user_id": message.user_id,
+        "role": message.role,
+        "content": message.content,
+        "created_at": message.created_at.isoformat(),
+    }
+
+
+def _dict_to_message(conversation_id: int, data: dict) -> Message:
+    return Message(
+        id=data["id"],
+        user_id=data["user_id"],
+        conversation_id=conversation_id,
+        role=data["role"],
+        content=data["content"],
+        created_at=datetime.fromisoformat(data["created_at"]),
+    )
+
+
+# --------------------------------------------------
+# Archive / restore a single conversation
+# --------------------------------------------------
+def archive_conversation(session: Session, conversation_id: int, cutoff: datetime) -> Optional[dict]:
+    """
+    Move a conversation's hot messages into its archive blob.
+    Messages already archived are kept and merged with the new ones.
+    The conversation row is locked and re-checked against `cutoff` first,
+    so a /chat that touched it meanwhile wins and nothing is moved
+    (returns None). Caller commits.
+    """
+    conversation = session.exec(
+        select(Conversation).where(
+            Conversation.id == conversation_id,
+            Conversation.updated_at < cutoff,
+        ).with_for_update()
+    ).first()
+    if not conversation:
+        return None
+
+    statement = select(Message).where(
+        Message.conversation_id == conversation_id
+    ).order_by(Message.created_at)
+    hot = [_message_to_dict(msg) for msg in session.exec(statement)]
+
+    archive = session.exec(
+        select(ConversationArchive).where(
+            ConversationArchive.conversation_id == conversation_id
+        )
+    ).first()
+    if archive:
+        packed = _unpack(archive.payload) + hot
+    else:
+        packed = hot
+        archive = ConversationArchive(
+            conversation_id=conversation_id,
+            user_id=conversation.user_id,
+            payload=b"",
+        )
+
+    archive.payload = _pack(packed)
+    archive.message_count = len(packed)
+    archive.archived_at = datetime.utcnow()
+    session.add(archive)
+    # Only delete what was packed: messages written since the SELECT stay hot
+    session.execute(
+        delete(Message).where(Message.id.in_([msg["id"] for msg in hot]))
+    )
+
+    raw_bytes = sum(len(msg["content"].encode()) for msg in hot)
+    return {
+        "messages": len(hot),
+        "raw_bytes": raw_bytes,
+        "archived_bytes": len(archive.payload),
+    }
+
+
+def get_archived_messages(session: Session, conversation_id: int) -> list:
+    """Read archived messages for a conversation without restoring them."""
+    archive = session.exec(
+        select(ConversationArchive).where(
+            ConversationArchive.conversation_id == conversation_id
+        )
+    ).first()
+    if not archive:
+        return []
+    return [_dict_to_message(conversation_id, data) for data in _unpack(archive.payload)]
+
+
+def iter_archived_message_rows(
+    session: Session,
+    user_id: Optional[str] = None,
+    batch_size: int = 50,
+) -> Iterator[dict]:
+    """
+    Yield archived messages as plain Message rows (for bulk export).
+    Archives are streamed and unpacked one at a time, so memory is bounded
+    by the largest single conversation.
+    """
+    statement = select(
+        ConversationArchive.conversation_id, ConversationArchive.payload
+    ).order_by(ConversationArchive.conversation_id)
+    if user_id is not None:
+        statement = statement.where(ConversationArchive.user_id == user_id)
+
+    result = session.execute(statement.execution_options(yield_per=batch_size))
+    for conversation_id, payload in result:
+        for data in _unpack(payload):
+            yield {
+                "id": data["id"],
+                "user_id": data["user_id"],
+                "conversation_id": conversation_id,
+                "role": data["role"],
+                "content": data["content"],
+                "created_at": data["created_at"],
+            }
+
+
+def restore_conversation(session: Session, conversation_id: int) -> int:
+    """
+    Move an archived conversation back into the hot Message table.
+    Used when an archived conversation becomes active again.
+    Locks the conversation row (same lock as archive_conversation) and
+    marks it active, so the compaction job can't re-archive it mid-chat.
+    Returns how many messages were restored. Caller commits.
+    """
+    conversation = session.exec(
+        select(Conversation).where(
+            Conversation.id == conversation_id
+        ).with_for_update()
+    ).first()
+    if not conversation:
+        return 0
+
+    archive = session.exec(
+        select(ConversationArchive).where(
+            ConversationArchive.conversation_id == conversation_id
+        )
+    ).first()
+    if not archive:
+        return 0
+
+    rows = _unpack(archive.payload)
+    if rows:
+        session.execute(
+            insert(Message.__table__),
+            [
+                _dict_to_message(conversation_id, data).model_dump()
+                for data in rows
+            ],
+        )
+    session.delete(archive)
+    conversation.updated_at = datetime.utcnow()
+    session.add(conversation)
+    return len(rows)
+
+
+# --------------------------------------------------
+# Compaction job
+# --------------------------------------------------
+def compact_inactive_conversations(
+    older_than_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    user_id: Optional[str] = None,
+) -> dict:
+    """
+    Archive messages of conversations inactive for `older_than_days`.
+    Pass `user_id` to compact (and purge) only that user's conversations.
+    Each conversation is archived in its own transaction, so an
+    interrupted run never leaves a half-moved conversation behind.
+    Returns a report of what was moved.
+    """
+    days = ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    limit = ARCHIVE_BATCH_SIZE if batch_size is None else batch_size
+    cutoff = datetime.utcnow() - timedelta(days=days)
+
+    has_hot_messages = exists().where(Message.conversation_id == Conversation.id)
+    statement = select(Conversation.id).where(
+        Conversation.updated_at < cutoff,
+        has_hot_messages,
+    ).order_by(Conversation.updated_at).limit(limit)
+    if user_id is not None:
+        statement = statement.where(Conversation.user_id == user_id)
+
+    report = {"conversations": 0, "messages": 0, "raw_bytes": 0, "archived_bytes": 0}
+    with Session(engine) as session:
+        for conversation_id in session.exec(statement).all():
+            moved = archive_conversation(session, conversation_id, cutoff)
+            session.commit()
+            if moved is None:
+                continue
+            report["conversations"] += 1
+            report["messages"] += moved["messages"]
+            report["raw_bytes"] += moved["raw_bytes"]
+            report["archived_bytes"] += moved["archived_bytes"]
+
+        report["purged"] = purge_expired_archives(session, user_id=user_id)
+
+    return report
+
+
+def purge_expired_archives(session: Session, user_id: Optional[str] = None) -> int:
+    """Delete archives older than ARCHIVE_PURGE_AFTER_DAYS (if enabled)."""
+    if ARCHIVE_PURGE_AFTER_DAYS <= 0:
+        return 0
+    cutoff = datetime.utcnow() - timedelta(days=ARCHIVE_PURGE_AFTER_DAYS)
+    statement = delete(ConversationArchive).where(ConversationArchive.archived_at < cutoff)
+    if user_id is not None:
+        statement = statement.where(ConversationArchive.user_id == user_id)
+    result = session.execute(statement)
+    session.commit()
+    return result.rowcount
+
+
+async def run_compaction_loop() -> None:
+    """Run compaction every ARCHIVE_INTERVAL_MINUTES (started from the app lifespan)."""
+    while True:
+        try:
+            report = await run_in_threadpool(compact_inactive_conversations)
+            if report["conversations"]:
+                print(f"🗄️ Archived {report['conversations']} conversations "
+                      f"({report['messages']} messages)")
+        except Exception as e:
+            print(f"❌ Error in compaction job: {str(e)}")
+        await asyncio.sleep(ARCHIVE_INTERVAL_MINUTES * 60)
+
+
+if __name__ == "__main__":
+    print(compact_inactive_conversations())
@@ -0,0 +1,136 @@
+# backend/bulk.py
+from datetime import datetime
+from typing import AsyncIterator, Iterator, Optional
+import json
+
+from sqlalchemy import insert, select, text
+from sqlmodel import Session
+
+from database import engine
+from models import Task, Conversation, Message
+from archive import iter_archived_message_rows
+
+# --------------------------------------------------
+# Tables that can be exported / imported in bulk
+# --------------------------------------------------
+BULK_MODELS = {
+    "tasks": Task,
+    "conversations": Conversation,
+    "messages": Message,
+}
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 1000
+
+# Rows inserted per transaction during import
+IMPORT_BATCH_SIZE = 1000
+
+
+def _json_default(value):
+    """Serialize values json.dumps can't handle on its own (datetimes)."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+# --------------------------------------------------
+# Export
+# --------------------------------------------------
+def export_ndjson(
+    model,
+    user_id: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[bytes]:
+    """
+    Yield every row of a table as one NDJSON line.
+    Rows are streamed from a server-side cursor (yield_per), so memory
+    stays flat no matter how many rows the table holds.
+    Messages also include those compacted into ConversationArchive, so an
+    export always holds a user's full history.
+    """
+    table = model.__table__
+    statement = select(table).order_by(table.c.id)
+    if user_id is not None:
+        statement = statement.where(table.c.user_id == user_id)
+
+    # Own session: the generator outlives the request dependency
+    with Session(engine) as session:
+        result = session.execute(
+            statement.execution_options(yield_per=batch_size)
+        )
+        for row in result.mappings():
+            yield (json.dumps(dict(row), default=_json_default) + "\n").encode()
+
+        if model is Message:
+            for row in iter_archived_message_rows(session, user_id=user_id):
+                yield (json.dumps(row) + "\n").encode()
+
+
+# --------------------------------------------------
+# Import
+# --------------------------------------------------
+def parse_row(model, line: bytes, keep_ids: bool) -> dict:
+    """
+    Validate one NDJSON line against the model and return insertable values.
+    One rule per import: either every row carries its id (kept as is) or
+    none does (the database assigns them). Mixing the two is rejected so
+    ids never get dropped silently.
+    """
+    values = model.model_validate(json.loads(line)).model_dump()
+    if (values["id"] is not None) != keep_ids:
+        raise ValueError(
+            "Row id mismatch: every row must have an id, or none may"
+            if keep_ids else
+            "Row id mismatch: first row had no id, so no row may have one"
+        )
+    if not keep_ids:
+        del values["id"]
+    return values
+
+
+def line_has_id(line: bytes) -> bool:
+    """Check whether an NDJSON line carries an id (decides the import's id rule)."""
+    return json.loads(line).get("id") is not None
+
+
+def insert_batch(model, rows: list) -> int:
+    """Insert a batch of rows in a single transaction."""
+    if not rows:
+        return 0
+    with Session(engine) as session:
+        session.execute(insert(model.__table__), rows)
+        session.commit()
+    return len(rows)
+
+
+def sync_id_sequence(model) -> None:
+    """
+    Move the Postgres id sequence past imported ids.
+    Needed when rows are imported with their original ids.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    table = model.__table__.name
+    with Session(engine) as session:
+        session.execute(
+            text(
+                "SELECT setval(pg_get_serial_sequence(:table, 'id'), "
+                f"(SELECT COALESCE(MAX(id), 1) FROM \"{table}\"))"
+            ),
+            {"table": table},
+        )
+        session.commit()
+
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Split a streamed request body into NDJSON lines without buffering it all."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
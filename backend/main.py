@@ -1,13 +1,41 @@
 # backend/main.py
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlmodel import Session, select
 from database import create_db_and_tables, get_session
 from models import Conversation, Message, Task
 from agent import run_agent
 from mcp_server import mcp_app
+from bulk import (
+    BULK_MODELS,
+    IMPORT_BATCH_SIZE,
+    export_ndjson,
+    insert_batch,
+    iter_ndjson_lines,
+    line_has_id,
+    parse_row,
+    sync_id_sequence,
+)
+from archive import (
+    ARCHIVE_INTERVAL_MINUTES,
+    get_archived_messages,
+    restore_conversation,
+    run_compaction_loop,
+)
+from versions import (
+    MAX_WAIT_SECONDS,
+    bump_version,
+    etag_for,
+    etag_matches,
+    get_version,
+    wait_for_change,
+)
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
+from datetime import datetime
+import asyncio
 import uvicorn
 
 # Lifespan context manager for startup/shutdown events
@@ -17,8 +45,13 @@ async def lifespan(app: FastAPI):
     print("🔄 Creating database tables...")
     create_db_and_tables()
     print("✅ Database tables created successfully!")
+    compaction_task = None
+    if ARCHIVE_INTERVAL_MINUTES > 0:
+        compaction_task = asyncio.create_task(run_compaction_loop())
     yield
-    # Shutdown (if needed, add cleanup code here)
+    # Shutdown
+    if compaction_task:
+        compaction_task.cancel()
 
 # Create main app with lifespan
 app = FastAPI(
@@ -37,6 +70,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],  # let the frontend read it for If-None-Match
 )
 
 # Add CORS to MCP app as well
@@ -50,6 +84,7 @@ mcp_app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],  # let the frontend read it for If-None-Match
 )
 
 # Mount MCP server
@@ -74,6 +109,9 @@ def chat(request: ChatRequest, session: Session = Depends(get_session)):
                 session.add(conversation)
                 session.commit()
                 session.refresh(conversation)
+            elif restore_conversation(session, conversation.id):
+                # Archived conversation is active again: bring it back to the hot table
+                session.commit()
         else:
             conversation = Conversation(user_id=request.user_id)
             session.add(conversation)
@@ -115,6 +153,8 @@ def chat(request: ChatRequest, session: Session = Depends(get_session)):
         
         session.add(user_msg)
         session.add(assistant_msg)
+        conversation.updated_at = datetime.utcnow()
+        session.add(conversation)
         session.commit()
         
         return {
@@ -129,6 +169,10 @@ def chat(request: ChatRequest, session: Session = Depends(get_session)):
             "conversation_id": request.conversation_id,
             "error": True
         }
+    
+    finally:
+        # Conversations or messages may have been written either way
+        bump_version(request.user_id)
 
 # Health check
 @app.get("/")
@@ -137,8 +181,18 @@ def root():
 
 # Get conversations endpoint
 @app.get("/conversations/{user_id}")
-def get_conversations(user_id: str, session: Session = Depends(get_session)):
-    """Get all conversations for a user"""
+def get_conversations(
+    user_id: str,
+    response: Response,
+    if_none_match: str | None = Header(None),
+    session: Session = Depends(get_session)
+):
+    """Get all conversations for a user (304 if nothing changed since the client's ETag)"""
+    etag = etag_for(user_id)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
     statement = select(Conversation).where(Conversation.user_id == user_id)
     conversations = session.exec(statement).all()
     return {"conversations": conversations}
@@ -146,13 +200,88 @@ def get_conversations(user_id: str, session: Session = Depends(get_session)):
 # Get conversation messages endpoint
 @app.get("/conversations/{conversation_id}/messages")
 def get_messages(conversation_id: int, session: Session = Depends(get_session)):
-    """Get all messages in a conversation"""
+    """Get all messages in a conversation (archived ones included)"""
     statement = select(Message).where(
         Message.conversation_id == conversation_id
     ).order_by(Message.created_at)
     messages = session.exec(statement).all()
+    archived = get_archived_messages(session, conversation_id)
+    if archived:
+        messages = sorted(archived + list(messages), key=lambda msg: msg.created_at)
     return {"messages": messages}
 
+# Long-poll endpoint: wait for a user's data to change
+@app.get("/changes/{user_id}")
+async def wait_for_changes(user_id: str, since: int | None = None, timeout: float = 30):
+    """
+    Return once the user's change version differs from `since`
+    (or after `timeout` seconds). Replaces tight polling of the read endpoints.
+    """
+    if since is None:
+        return {"version": get_version(user_id), "changed": False}
+
+    timeout = min(max(timeout, 0), MAX_WAIT_SECONDS)
+    version = await wait_for_change(user_id, since, timeout)
+    return {"version": version, "changed": version != since}
+
+# Bulk export endpoint (NDJSON stream)
+@app.get("/export/{table}")
+def export_table(table: str, user_id: str | None = None):
+    """Stream a table (optionally one user's rows) as NDJSON"""
+    model = BULK_MODELS.get(table)
+    if not model:
+        return {"success": False, "error": f"Unknown table: {table}"}
+
+    return StreamingResponse(
+        export_ndjson(model, user_id=user_id),
+        media_type="application/x-ndjson"
+    )
+
+def bump_batch_users(batch: list) -> None:
+    """Bump the change version of every user touched by an import batch"""
+    for user_id in {row["user_id"] for row in batch}:
+        bump_version(user_id)
+
+# Bulk import endpoint (NDJSON stream)
+@app.post("/import/{table}")
+async def import_table(table: str, request: Request):
+    """Insert NDJSON rows from the request body, committing in chunks"""
+    model = BULK_MODELS.get(table)
+    if not model:
+        return {"success": False, "error": f"Unknown table: {table}"}
+
+    imported = 0
+    line_number = 0
+    keep_ids = None
+    batch = []
+    try:
+        async for line in iter_ndjson_lines(request.stream()):
+            line_number += 1
+            if keep_ids is None:
+                keep_ids = line_has_id(line)
+            batch.append(parse_row(model, line, keep_ids))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                imported += await run_in_threadpool(insert_batch, model, batch)
+                bump_batch_users(batch)
+                batch = []
+        imported += await run_in_threadpool(insert_batch, model, batch)
+        bump_batch_users(batch)
+    except Exception as e:
+        print(f"❌ Error importing {table} at line {line_number}: {str(e)}")
+        return {
+            "success": False,
+            "error": str(e),
+            "line": line_number,
+            "imported": imported
+        }
+    finally:
+        # Earlier chunks stay committed even if a later line fails,
+        # so the sequence must move past their ids either way
+        if keep_ids and imported > 0:
+            await run_in_threadpool(sync_id_sequence, model)
+
+    return {"success": True, "imported": imported}
+
 # TEST ENDPOINT: Create sample tasks - CHANGED TO GET
 @app.get("/test/create-task")
 def create_test_task(session: Session = Depends(get_session)):
@@ -191,6 +320,7 @@ def create_test_task(session: Session = Depends(get_session)):
         session.add(task)
     
     session.commit()
+    bump_version("demo-user")
     
     # Refresh to get IDs
     for task in test_tasks:
@@ -243,6 +373,7 @@ def clear_tasks(session: Session = Depends(get_session)):
         session.delete(task)
     
     session.commit()
+    bump_version("demo-user")
     
     return {
         "message": f"🗑️ Deleted {count} tasks",
@@ -1,8 +1,9 @@
 # backend/mcp_server.py
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Header, Response
 from sqlmodel import Session, select
 from database import get_session
 from models import Task, Conversation, Message
+from versions import bump_version, etag_for, etag_matches
 from typing import List, Optional
 from pydantic import BaseModel
 
@@ -37,6 +38,7 @@ def create_task(request: CreateTaskRequest, session: Session = Depends(get_sessi
     session.add(task)
     session.commit()
     session.refresh(task)
+    bump_version(task.user_id)
     
     return {
         "success": True,
@@ -50,8 +52,18 @@ def create_task(request: CreateTaskRequest, session: Session = Depends(get_sessi
 
 # Tool 2: List Tasks
 @mcp_app.get("/tools/list_tasks")
-def list_tasks(user_id: str, session: Session = Depends(get_session)):
-    """Get all tasks for a user"""
+def list_tasks(
+    user_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    session: Session = Depends(get_session)
+):
+    """Get all tasks for a user (304 if nothing changed since the client's ETag)"""
+    etag = etag_for(user_id)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    
     statement = select(Task).where(Task.user_id == user_id)
     tasks = session.exec(statement).all()
     
@@ -92,6 +104,7 @@ def update_task(
     session.add(task)
     session.commit()
     session.refresh(task)
+    bump_version(task.user_id)
     
     return {
         "success": True,
@@ -114,6 +127,7 @@ def delete_task(task_id: int, user_id: str, session: Session = Depends(get_sessi
     
     session.delete(task)
     session.commit()
+    bump_version(user_id)
     
     return {"success": True, "message": "Task deleted"}
 
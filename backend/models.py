@@ -36,3 +36,15 @@ class Message(SQLModel, table=True):
     role: str  # "user" or "assistant"
     content: str  # The actual message text
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ConversationArchive(SQLModel, table=True):
+    """
+    ConversationArchive Model - Cold storage for inactive conversations
+    Holds all messages of one conversation as a compressed JSON blob
+    """
+    id: Optional[int] = Field(default=None, primary_key=True)
+    conversation_id: int = Field(foreign_key="conversation.id", unique=True, index=True)
+    user_id: str = Field(index=True)  # Who owns this conversation
+    message_count: int = Field(default=0)  # How many messages are packed
+    payload: bytes  # zlib-compressed JSON list of messages
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, insert
+from sqlmodel import Session, select
+from database import create_db_and_tables, engine
+from models import Conversation, ConversationArchive, Message
+from archive import (
+    archive_conversation,
+    compact_inactive_conversations,
+    get_archived_messages,
+    restore_conversation,
+)
+from bulk import export_ndjson
+import time
+
+TEST_USER = "archive_test_user"
+CONVERSATIONS = 2000
+MESSAGES_PER_CONVERSATION = 20
+ACTIVE_EVERY = 10  # every 10th conversation stays active
+QUERY_RUNS = 200
+
+def clear_test_data():
+    with Session(engine) as session:
+        ids = select(Conversation.id).where(Conversation.user_id == TEST_USER)
+        session.execute(delete(Message).where(Message.conversation_id.in_(ids)))
+        session.execute(delete(ConversationArchive).where(ConversationArchive.conversation_id.in_(ids)))
+        session.execute(delete(Conversation).where(Conversation.user_id == TEST_USER))
+        session.commit()
+
+def seed():
+    """Create conversations, most of them inactive for 90 days"""
+    old = datetime.utcnow() - timedelta(days=90)
+    with Session(engine) as session:
+        conversations = [
+            Conversation(
+                user_id=TEST_USER,
+                updated_at=datetime.utcnow() if i % ACTIVE_EVERY == 0 else old
+            )
+            for i in range(CONVERSATIONS)
+        ]
+        session.add_all(conversations)
+        session.commit()
+        ids = [c.id for c in conversations]
+        for conversation_id in ids:
+            session.execute(insert(Message.__table__), [
+                {
+                    "user_id": TEST_USER,
+                    "conversation_id": conversation_id,
+                    "role": "user" if n % 2 == 0 else "assistant",
+                    "content": f"Please add task number {n} to my todo list, thanks!",
+                    "created_at": old + timedelta(seconds=n),
+                }
+                for n in range(MESSAGES_PER_CONVERSATION)
+            ])
+        session.commit()
+    return ids
+
+def hot_message_count(session):
+    """Hot Message rows belonging to the test user"""
+    statement = select(func.count()).select_from(Message).where(Message.user_id == TEST_USER)
+    return session.execute(statement).scalar_one()
+
+def time_history_query(session, conversation_id):
+    """Average latency of the /chat history query in milliseconds"""
+    statement = select(Message).where(
+        Message.conversation_id == conversation_id
+    ).order_by(Message.created_at)
+    start = time.perf_counter()
+    for _ in range(QUERY_RUNS):
+        session.exec(statement).all()
+        session.expunge_all()
+    return (time.perf_counter() - start) / QUERY_RUNS * 1000
+
+def test_archive():
+    """
+    Test compaction on a seeded dataset and report hot-table and latency gains
+    """
+    print("🔄 Creating database tables...")
+    create_db_and_tables()
+    clear_test_data()
+
+    print(f"\n🔄 Seeding {CONVERSATIONS} conversations...")
+    ids = seed()
+    active_id, inactive_id = ids[0], ids[1]
+
+    with Session(engine) as session:
+        rows_before = hot_message_count(session)
+        latency_before = time_history_query(session, active_id)
+
+    print("\n🔄 Compacting inactive conversations...")
+    # Scoped to the test user: real users' conversations are never touched
+    report = compact_inactive_conversations(
+        older_than_days=30, batch_size=CONVERSATIONS, user_id=TEST_USER
+    )
+    expected = CONVERSATIONS - CONVERSATIONS // ACTIVE_EVERY
+    assert report["conversations"] == expected, report
+
+    with Session(engine) as session:
+        rows_after = hot_message_count(session)
+        assert rows_after == rows_before - expected * MESSAGES_PER_CONVERSATION
+
+    # Bulk export still holds the full history (hot + archived)
+    exported = sum(1 for _ in export_ndjson(Message, user_id=TEST_USER))
+    assert exported == rows_before, f"exported {exported} of {rows_before} messages"
+
+    with Session(engine) as session:
+        latency_after = time_history_query(session, active_id)
+
+        # Archived threads read back intact
+        archived = get_archived_messages(session, inactive_id)
+        assert len(archived) == MESSAGES_PER_CONVERSATION
+        assert archived[0].content.startswith("Please add task number 0")
+
+        # Restoring moves them back to the hot table and marks the thread active
+        assert restore_conversation(session, inactive_id) == MESSAGES_PER_CONVERSATION
+        session.commit()
+        assert get_archived_messages(session, inactive_id) == []
+
+        # An active conversation is re-checked under lock and left alone
+        cutoff = datetime.utcnow() - timedelta(days=30)
+        assert archive_conversation(session, inactive_id, cutoff) is None
+        assert archive_conversation(session, active_id, cutoff) is None
+        session.commit()
+
+    print(f"✅ Hot message rows: {rows_before} -> {rows_after}")
+    print(f"✅ Archived {report['raw_bytes']} content bytes into {report['archived_bytes']} bytes")
+    print(f"✅ History query: {latency_before:.2f} ms -> {latency_after:.2f} ms")
+
+    clear_test_data()
+    print("\n🎉 Conversation archival is working!")
+
+if __name__ == "__main__":
+    test_archive()
@@ -0,0 +1,203 @@
+from sqlalchemy import func
+from sqlmodel import Session, delete, select
+from database import create_db_and_tables, engine
+from models import Task
+from bulk import IMPORT_BATCH_SIZE, export_ndjson, insert_batch, iter_ndjson_lines, parse_row
+from main import app
+from contextlib import contextmanager
+import asyncio
+import json
+import tracemalloc
+
+TEST_USER = "bulk_test_user"
+ROW_COUNT = 50_000
+EXPORT_MEMORY_CEILING = 8 * 1024 * 1024  # 8 MB, far below buffering every row
+IMPORT_MEMORY_CEILING = 8 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024  # request body chunk size; lines get split across chunks
+
+def clear_test_tasks():
+    with Session(engine) as session:
+        session.exec(delete(Task).where(Task.user_id == TEST_USER))
+        session.commit()
+
+@contextmanager
+def measure_peak():
+    """
+    Trace peak memory of the block with SQL echo off.
+    Otherwise pytest's log capture keeps every INSERT log record alive
+    inside the window and the peak measures the logs, not the code.
+    """
+    echo = engine.echo
+    engine.echo = False
+    tracemalloc.start()
+    result = {}
+    try:
+        yield result
+    finally:
+        result["peak"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        engine.echo = echo
+
+def count_test_tasks():
+    with Session(engine) as session:
+        statement = select(func.count()).select_from(Task).where(Task.user_id == TEST_USER)
+        return session.exec(statement).one()
+
+def ndjson_chunks(rows, chunk_size=CHUNK_SIZE):
+    """Lazily encode rows as NDJSON and cut the stream into fixed-size chunks"""
+    buffer = b""
+    for row in rows:
+        buffer += (json.dumps(row) + "\n").encode()
+        while len(buffer) >= chunk_size:
+            yield buffer[:chunk_size]
+            buffer = buffer[chunk_size:]
+    if buffer:
+        yield buffer
+
+async def post_stream(path, chunks):
+    """
+    POST a chunked body straight into the ASGI app.
+    (TestClient reads the whole body up front, which would hide buffering.)
+    """
+    chunks = iter(chunks)
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/x-ndjson")],
+        "client": ("test", 0),
+        "server": ("test", 80),
+    }
+
+    async def receive():
+        chunk = next(chunks, None)
+        if chunk is None:
+            return {"type": "http.request", "body": b"", "more_body": False}
+        return {"type": "http.request", "body": chunk, "more_body": True}
+
+    body = []
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return json.loads(b"".join(body))
+
+async def collect_lines(chunks):
+    return [line async for line in iter_ndjson_lines(chunks)]
+
+async def as_async(chunks):
+    for chunk in chunks:
+        yield chunk
+
+def test_bulk_export_import():
+    """
+    Test NDJSON export/import round trip and that export memory stays flat
+    """
+    print("🔄 Creating database tables...")
+    create_db_and_tables()
+    clear_test_tasks()
+
+    print(f"\n🔄 Seeding {ROW_COUNT} tasks...")
+    rows = [
+        {"user_id": TEST_USER, "title": f"Bulk task {i}", "completed": i % 2 == 0}
+        for i in range(ROW_COUNT)
+    ]
+    for start in range(0, ROW_COUNT, 1000):
+        insert_batch(Task, rows[start:start + 1000])
+    del rows
+
+    print("\n🔄 Exporting tasks...")
+    lines = 0
+    exported = []
+    with measure_peak() as measured:
+        for line in export_ndjson(Task, user_id=TEST_USER):
+            lines += 1
+            if lines <= 10:
+                exported.append(line)
+    peak = measured["peak"]
+
+    assert lines == ROW_COUNT, f"expected {ROW_COUNT} lines, got {lines}"
+    assert peak < EXPORT_MEMORY_CEILING, f"export peaked at {peak} bytes"
+    print(f"✅ Exported {lines} tasks, peak memory {peak / 1024:.0f} KB")
+
+    print("\n🔄 Re-importing exported tasks...")
+    clear_test_tasks()
+    imported = insert_batch(Task, [parse_row(Task, line, keep_ids=True) for line in exported])
+    assert imported == len(exported)
+    assert list(export_ndjson(Task, user_id=TEST_USER)) == exported
+    print(f"✅ Round trip of {imported} tasks matches")
+
+    clear_test_tasks()
+    print("\n🎉 Bulk export/import is working!")
+
+def test_bulk_streaming_import():
+    """
+    Test POST /import/{table} with a chunked body: line splitting, batch
+    flushing, error reporting and that import memory stays flat
+    """
+    print("🔄 Creating database tables...")
+    create_db_and_tables()
+    clear_test_tasks()
+
+    print("\n🔄 Splitting NDJSON lines across chunks...")
+    chunks = [b'{"a": 1}\n{"b"', b': 2}\n', b'\n{"c": ', b'3}']
+    lines = asyncio.run(collect_lines(as_async(chunks)))
+    assert lines == [b'{"a": 1}', b'{"b": 2}', b'{"c": 3}'], lines
+    print("✅ Lines split across chunks are reassembled")
+
+    print(f"\n🔄 Streaming {ROW_COUNT} tasks into /import/tasks...")
+    # Padded so the whole body is bigger than the ceiling: buffering it would fail
+    rows = (
+        {
+            "user_id": TEST_USER,
+            "title": f"Imported task {i}",
+            "description": "x" * 200,
+            "completed": i % 2 == 0,
+        }
+        for i in range(ROW_COUNT)
+    )
+    sent = 0
+
+    def counted(chunks):
+        nonlocal sent
+        for chunk in chunks:
+            sent += len(chunk)
+            yield chunk
+
+    with measure_peak() as measured:
+        result = asyncio.run(post_stream("/import/tasks", counted(ndjson_chunks(rows))))
+    peak = measured["peak"]
+
+    assert sent > IMPORT_MEMORY_CEILING, f"body of {sent} bytes is too small to prove streaming"
+    assert result == {"success": True, "imported": ROW_COUNT}, result
+    assert count_test_tasks() == ROW_COUNT
+    assert peak < IMPORT_MEMORY_CEILING, f"import peaked at {peak} bytes"
+    print(f"✅ Imported {ROW_COUNT} tasks ({sent / 1024:.0f} KB body), peak memory {peak / 1024:.0f} KB")
+
+    print("\n🔄 Importing a body with a bad line...")
+    clear_test_tasks()
+    good = IMPORT_BATCH_SIZE * 2 + IMPORT_BATCH_SIZE // 2
+    rows = [{"user_id": TEST_USER, "title": f"Task {i}"} for i in range(good)]
+    rows.append({"user_id": TEST_USER})  # missing title
+    result = asyncio.run(post_stream("/import/tasks", ndjson_chunks(rows, chunk_size=100)))
+
+    # Full batches before the bad line are committed, the partial one is not
+    assert result["success"] is False, result
+    assert result["line"] == good + 1, result
+    assert result["imported"] == IMPORT_BATCH_SIZE * 2, result
+    assert count_test_tasks() == IMPORT_BATCH_SIZE * 2
+    print(f"✅ Error reported at line {result['line']} after {result['imported']} rows")
+
+    clear_test_tasks()
+    print("\n🎉 Streaming import is working!")
+
+if __name__ == "__main__":
+    test_bulk_export_import()
+    test_bulk_streaming_import()
@@ -0,0 +1,154 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session, delete, select
+from database import create_db_and_tables, engine
+from models import Conversation, Message, Task
+from versions import _waiters, bump_version, etag_for, etag_matches, get_version, wait_for_change
+import asyncio
+import threading
+import main
+
+TEST_USER = "versions_test_user"
+DEMO_USER = "demo-user"  # written by the /test/* endpoints, polled by the frontend
+
+def read_endpoints(user_id):
+    return [
+        (f"/conversations/{user_id}", {}),
+        ("/mcp/tools/list_tasks", {"user_id": user_id}),
+    ]
+
+def clear_test_data():
+    with Session(engine) as session:
+        ids = select(Conversation.id).where(Conversation.user_id == TEST_USER)
+        session.execute(delete(Message).where(Message.conversation_id.in_(ids)))
+        session.execute(delete(Conversation).where(Conversation.user_id == TEST_USER))
+        session.execute(delete(Task).where(Task.user_id == TEST_USER))
+        session.commit()
+
+def assert_not_modified(client, user_id=TEST_USER):
+    """Every read endpoint answers a matching If-None-Match with 304"""
+    etags = []
+    for path, params in read_endpoints(user_id):
+        first = client.get(path, params=params)
+        assert first.status_code == 200, (path, first.status_code)
+        etag = first.headers["etag"]
+        again = client.get(path, params=params, headers={"If-None-Match": etag})
+        assert again.status_code == 304, (path, again.status_code)
+        assert again.headers["etag"] == etag
+        assert again.content == b""
+        etags.append(etag)
+    return etags
+
+def assert_invalidates(client, name, write, user_id=TEST_USER):
+    """A write path must change the ETag of every read endpoint"""
+    etags = assert_not_modified(client, user_id)
+    write()
+    for (path, params), etag in zip(read_endpoints(user_id), etags):
+        after = client.get(path, params=params, headers={"If-None-Match": etag})
+        assert after.status_code == 200, f"{name} did not invalidate {path}"
+        assert after.headers["etag"] != etag
+    print(f"✅ {name} invalidates the ETag")
+
+def test_versions():
+    """
+    Test change versions, ETag matching and the long-poll wait
+    """
+    print("🔄 Testing change versions...")
+    etag = etag_for(TEST_USER)
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert not etag_matches(None, etag)
+
+    version = bump_version(TEST_USER)
+    assert get_version(TEST_USER) == version
+    assert not etag_matches(etag, etag_for(TEST_USER))
+    print(f"✅ Version bumped to {version}, old ETag no longer matches")
+
+    print("\n🔄 Testing long-poll wait...")
+    # Times out when nothing changes
+    assert asyncio.run(wait_for_change(TEST_USER, version, 0.1)) == version
+
+    # Wakes up when a write happens on another thread
+    timer = threading.Timer(0.2, bump_version, args=[TEST_USER])
+    timer.start()
+    assert asyncio.run(wait_for_change(TEST_USER, version, 5)) == version + 1
+    timer.join()
+    print("✅ Waiter woke up on change")
+
+    # A cancelled long-poll (client disconnect) doesn't leave its waiter behind
+    async def cancel_wait():
+        task = asyncio.create_task(wait_for_change(TEST_USER, version + 1, 5))
+        await asyncio.sleep(0.05)
+        assert TEST_USER in _waiters
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(cancel_wait())
+    assert TEST_USER not in _waiters
+    print("✅ Cancelled waiter is cleaned up")
+
+    print("\n🎉 Change versioning is working!")
+
+def test_conditional_get_endpoints():
+    """
+    Test 304 responses on the read endpoints and that every write path bumps the ETag
+    """
+    # Don't call the real model from /chat
+    main.run_agent = lambda **kwargs: "ok"
+    create_db_and_tables()
+    clear_test_data()
+
+    with TestClient(main.app) as client:
+        print("\n🔄 Testing conditional GETs...")
+        assert_not_modified(client)
+        print("✅ Read endpoints return 304 on a matching ETag")
+
+        # Cross-origin JS can only read the ETag if CORS exposes it
+        origin = {"Origin": "http://localhost:3000"}
+        for path, params in read_endpoints(TEST_USER):
+            response = client.get(path, params=params, headers=origin)
+            exposed = response.headers.get("access-control-expose-headers", "")
+            assert "etag" in exposed.lower(), (path, exposed)
+        print("✅ ETag is exposed to cross-origin requests")
+
+        print("\n🔄 Testing write paths...")
+        created = {}
+
+        def create_task():
+            response = client.post("/mcp/tools/create_task", json={"user_id": TEST_USER, "title": "ETag task"})
+            created["id"] = response.json()["task"]["id"]
+
+        assert_invalidates(client, "create_task", create_task)
+        assert_invalidates(client, "update_task", lambda: client.patch(
+            f"/mcp/tools/update_task/{created['id']}",
+            params={"user_id": TEST_USER},
+            json={"completed": True},
+        ))
+        assert_invalidates(client, "delete_task", lambda: client.delete(
+            f"/mcp/tools/delete_task/{created['id']}",
+            params={"user_id": TEST_USER},
+        ))
+        assert_invalidates(client, "/chat", lambda: client.post(
+            "/chat", json={"message": "hi", "user_id": TEST_USER}
+        ))
+        assert_invalidates(client, "import", lambda: client.post(
+            "/import/tasks", content=f'{{"user_id": "{TEST_USER}", "title": "Imported"}}\n'
+        ))
+
+        # Demo helpers write demo-user tasks (clear first so create really creates)
+        assert_invalidates(client, "/test/clear-tasks", lambda: client.delete(
+            "/test/clear-tasks"
+        ), user_id=DEMO_USER)
+        assert_invalidates(client, "/test/create-task", lambda: client.get(
+            "/test/create-task"
+        ), user_id=DEMO_USER)
+        client.delete("/test/clear-tasks")
+
+    clear_test_data()
+    print("\n🎉 Conditional GETs are working!")
+
+if __name__ == "__main__":
+    test_versions()
+    test_conditional_get_endpoints()
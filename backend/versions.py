@@ -0,0 +1,85 @@
+# backend/versions.py
+from typing import Optional
+import asyncio
+import threading
+import uuid
+
+# --------------------------------------------------
+# Per-user change versions (in memory)
+# --------------------------------------------------
+# Every write for a user bumps their version; reads turn it into an ETag.
+# Versions live in this process only, so ETags carry a boot id: after a
+# restart every old ETag simply stops matching.
+_BOOT_ID = uuid.uuid4().hex[:8]
+
+_versions: dict = {}
+_waiters: dict = {}  # user_id -> set of (loop, asyncio.Event)
+_lock = threading.Lock()
+
+# Longest a client may wait on the long-poll endpoint (seconds)
+MAX_WAIT_SECONDS = 60
+
+
+def get_version(user_id: str) -> int:
+    """Current change version for a user (0 until their first write)."""
+    return _versions.get(user_id, 0)
+
+
+def bump_version(user_id: str) -> int:
+    """
+    Record a change for a user and wake anyone long-polling on them.
+    Safe to call from sync endpoints running in the threadpool.
+    """
+    with _lock:
+        version = _versions.get(user_id, 0) + 1
+        _versions[user_id] = version
+        waiters = _waiters.pop(user_id, set())
+    for loop, event in waiters:
+        loop.call_soon_threadsafe(event.set)
+    return version
+
+
+def etag_for(user_id: str) -> str:
+    """ETag for a user's current version."""
+    return f'"{_BOOT_ID}-{get_version(user_id)}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _discard_waiter(user_id: str, loop, event: asyncio.Event) -> None:
+    """Forget a long-poll waiter (no-op if bump_version already took it)."""
+    with _lock:
+        waiters = _waiters.get(user_id)
+        if waiters:
+            waiters.discard((loop, event))
+            if not waiters:
+                del _waiters[user_id]
+
+
+async def wait_for_change(user_id: str, since: int, timeout: float) -> int:
+    """
+    Wait until a user's version differs from `since` or `timeout` expires.
+    Returns the version at that point.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        with _lock:
+            version = _versions.get(user_id, 0)
+            if version != since:
+                return version
+            event = asyncio.Event()
+            _waiters.setdefault(user_id, set()).add((loop, event))
+        try:
+            await asyncio.wait_for(event.wait(), max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            return get_version(user_id)
+        finally:
+            # Runs on wake-up, timeout and client disconnect (CancelledError)
+            _discard_waiter(user_id, loop, event)